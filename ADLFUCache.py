@@ -18,8 +18,10 @@ from PIDController import PIDController, LowPassFilter
 class ADLFUCache(DLFUCache):
   """An Adaptive Decaying LFU Cache."""
 
-  def __init__(self, size, msize=None):
-    super(ADLFUCache, self).__init__(size, msize, 8.0)
+  __slots__ = ('slow_lpf', 'fast_lpf', 'pid', 'dt')
+
+  def __init__(self, size, msize=None, T=8.0, track_var=False, loader=None):
+    super(ADLFUCache, self).__init__(size, msize, T, track_var, loader)
     self.slow_lpf = LowPassFilter(2.0*size)
     self.fast_lpf = LowPassFilter(size/2.0)
     self.pid = PIDController.ZiglerNichols(8.0, size/2.0)
@@ -31,14 +33,13 @@ class ADLFUCache(DLFUCache):
     self.M = (T*self.size + 1.0) / (T*self.size)
 
   def __getitem__(self, key):
-    self.dt = 1.0
+    self.dt = dt = 1.0
     count = self.getcount(key) / self.T
-    slow = self.slow_lpf.update(count, self.dt)
-    fast = self.fast_lpf.update(count, self.dt)
+    slow = self.slow_lpf.update(count, dt)
+    fast = self.fast_lpf.update(count, dt)
     error = (fast - slow) # / (fast + slow)
-    control = self.pid.update(error, self.dt)
+    control = self.pid.update(error, dt)
     # Transform the pid control output into 0.0 < T < inf and T=8.0 when control=0.0.
-    T = 2.0 * (1.1 + control) / (1.1 - control)
-    self._setT(T)
+    self._setT(2.0 * (1.1 + control) / (1.1 - control))
     #print("%6d" % key, self, fast, slow, self.pid)
-    ret = super(ADLFUCache, self).__getitem__(key)
+    return super(ADLFUCache, self).__getitem__(key)
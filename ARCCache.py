@@ -39,6 +39,10 @@ class ARCCache(abc.MutableMapping):
     mhit_rate: The hit_rate for extra metadata.
   """
 
+  __slots__ = (
+      'size', 'p', 't1', 't2', 'b1', 'b2',
+      'get_count', 'set_count', 'del_count', 'hit_count', 'mhit_count')
+
   def __init__(self, size):
     self.size = size
     self.p = 0
@@ -79,62 +83,73 @@ class ARCCache(abc.MutableMapping):
 
   def _replace(self, key):
     """Evict an item out of the cache for replacement by key."""
+    t1, t2 = self.t1, self.t2
+    lt1 = len(t1)
     # If T1 + T2 is not full (possible from deletes), do nothing.
-    if len(self.t1) + len(self.t2) < self.size:
+    if lt1 + len(t2) < self.size:
       return
-    # T1 longer than p or equal to p and key in B2 or T2 empty.
-    if (len(self.t1) > self.p) or (0 < len(self.t1) == self.p and key in self.b2) or not self.t2:
-      oldk, _ = self.t1.popitem(False)
+    # Evict from T1 if it is longer than p or equal to p and key in B2 or
+    # T2 is empty, otherwise evict from T2.
+    p = self.p
+    if lt1 > p or (0 < lt1 == p and key in self.b2) or not t2:
+      oldk, _ = t1.popitem(False)
       self.b1[oldk] = None
-    # T1 shorter than p or equal to p and key not in b2 and T2 not empty.
     else:
-      oldk, _ = self.t2.popitem(False)
+      oldk, _ = t2.popitem(False)
       self.b2[oldk] = None
 
   def __getitem__(self, key):
     self.get_count += 1
-    # Get the value from T1 or T2 or raise KeyError for a miss.
-    if key in self.t1:
-      value = self.t1.pop(key)
+    t2 = self.t2
+    # Get the value from T2 or T1 or raise KeyError for a miss.
+    if key in t2:
+      # Move the entry to the end of T2 in place.
+      t2.move_to_end(key)
+      value = t2[key]
     else:
-      value = self.t2.pop(key)
+      # Move the entry from T1 to the end of T2.
+      value = t2[key] = self.t1.pop(key)
     self.hit_count += 1
-    # Move the entry to the end of T2.
-    self.t2[key] = value
     return value
 
   def __setitem__(self, key, value):
     self.set_count += 1
-    # if the key is in t1 or t2, just update them.
-    if key in self.t1:
-      self.t1[key] = value
-    elif key in self.t2:
-      self.t2[key] = value
+    t1, t2, b1, b2 = self.t1, self.t2, self.b1, self.b2
+    # if the key is in t1 or t2, just update them in place.
+    if key in t1:
+      t1[key] = value
+    elif key in t2:
+      t2[key] = value
     # A b1 hit, move to end of t2.
-    elif key in self.b1:
+    elif key in b1:
       self.mhit_count += 1
-      self.p = min(self.size, self.p + max(len(self.b2) // len(self.b1), 1))
+      # Grow p by max(len(b2)//len(b1), 1) limited to size.
+      p = self.p + (len(b2) // len(b1) or 1)
+      self.p = p if p < self.size else self.size
       self._replace(key)
-      self.b1.pop(key)
-      self.t2[key] = value
+      b1.pop(key)
+      t2[key] = value
     # A b2 hit, move to end of t2,
-    elif key in self.b2:
+    elif key in b2:
       self.mhit_count += 1
-      self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+      # Shrink p by max(len(b1)//len(b2), 1) limited to 0.
+      p = self.p - (len(b1) // len(b2) or 1)
+      self.p = p if p > 0 else 0
       self._replace(key)
-      self.b2.pop(key)
-      self.t2[key] = value
+      b2.pop(key)
+      t2[key] = value
     else:
       self._replace(key)
+      l1 = len(t1) + len(b1)
       # L1 full, pop an entry off b1.
-      if len(self.t1) + len(self.b1) == self.size:
+      if l1 == self.size:
         # Note: b1 cannot be empty after replace if L1 is full.
-        self.b1.popitem(False)
+        b1.popitem(False)
       # L1+L2 full, pop an entry of b2.
-      elif len(self.b1) + len(self.t1) + len(self.t2) + len(self.b2) == 2 * self.size:
+      elif l1 + len(t2) + len(b2) == 2 * self.size:
         # Note: b2 cannot be empty if L1+L2 is full and L1 is not.
-        self.b2.popitem(False)
-      self.t1[key] = value
+        b2.popitem(False)
+      t1[key] = value
 
   def __delitem__(self, key):
     if key in self.t1:
@@ -144,6 +159,10 @@ class ARCCache(abc.MutableMapping):
       self.t2.pop(key)
       self.b2[key] = None
 
+  def __contains__(self, key):
+    # Note this is a lookup that doesn't count as an access.
+    return key in self.t1 or key in self.t2
+
   def __iter__(self):
     return itertools.chain(iter(self.t1), iter(self.t2))
 
@@ -19,6 +19,8 @@ from PQueue import PQueueHeapq, PQueueLRU
 inf = float('inf')
 # NaN, used for things like hitrate with zero gets.
 nan = float('nan')
+# Marker for missing cache values.
+_missing = object()
 
 
 class DLFUCache(abc.MutableMapping):
@@ -40,10 +42,14 @@ class DLFUCache(abc.MutableMapping):
     mhit_count: The count of metadata hits.
     count_sum: the sum of all cache entry counts
     mcount_sum: the sum of all extra metadata counts.
-    count_sum2: The sum of the square of all cache entry counts.
-    mcount_sum2: the sum of the square of all extra metadata counts.
+    loader: Optional function for loading the value for a missing key.
 
   Properties:
+    track_var: If running sums of squares are kept for the variance stats.
+    count_sum2: The sum of the square of all cache entry counts.
+    mcount_sum2: the sum of the square of all extra metadata counts.
+    Note count_sum2 and mcount_sum2 are read-only, and are calculated O(N)
+    from the counts if track_var is not set.
     count_min: The minimum count value for cache entries.
     count_avg: The average of count values for cache entries.
     count_var: The variance of count values for cache entries.
@@ -65,12 +71,20 @@ class DLFUCache(abc.MutableMapping):
     thit_rate: The hit_rate for cache+metadata.
   """
 
-  def __init__(self, size, msize=None, T=4.0):
+  __slots__ = (
+      'size', 'msize', 'data', 'C', 'T', 'M', 'cqueue', 'mqueue',
+      'get_count', 'set_count', 'del_count', 'hit_count', 'mhit_count',
+      'count_sum', 'mcount_sum', '_track_var', '_count_sum2', '_mcount_sum2',
+      'loader')
+
+  def __init__(self, size, msize=None, T=4.0, track_var=False, loader=None):
     if msize is None:
       msize = size
     self.size = size
     self.msize = msize
     self.T = T
+    self._track_var = track_var
+    self.loader = loader
     if T == 0.0:
       # Behave like LRU with all counts decayed to zero.
       self.M = inf
@@ -95,8 +109,8 @@ class DLFUCache(abc.MutableMapping):
     self.C = 1.0
     self.count_sum = 0.0
     self.mcount_sum = 0.0
-    self.count_sum2 = 0.0
-    self.mcount_sum2 = 0.0
+    self._count_sum2 = 0.0
+    self._mcount_sum2 = 0.0
     self.reset_stats()
 
   def reset_stats(self):
@@ -138,6 +152,27 @@ class DLFUCache(abc.MutableMapping):
     """The sum of all cache+metadata entry counts."""
     return self.count_sum + self.mcount_sum
 
+  @property
+  def track_var(self):
+    """If running sums of squares are kept for the variance stats."""
+    return self._track_var
+
+  @property
+  def count_sum2(self):
+    """The sum of the squares of all cache entry counts."""
+    if self._track_var:
+      return self._count_sum2
+    # Not tracked, so calculate it O(N) from the cqueue.
+    return sum(p*p for p in self.cqueue.values())
+
+  @property
+  def mcount_sum2(self):
+    """The sum of the squares of all extra metadata counts."""
+    if self._track_var:
+      return self._mcount_sum2
+    # Not tracked, so calculate it O(N) from the mqueue.
+    return sum(p*p for p in self.mqueue.values())
+
   @property
   def tcount_sum2(self):
     """The sum of the squares of all cache+metadata entry counts."""
@@ -218,124 +253,125 @@ class DLFUCache(abc.MutableMapping):
     """The total cache+metadata hit rate."""
     return self.thit_count / self.get_count if self.get_count else nan
 
-  def _inccqueue(self, key):
-    """Increment the access count of a cqueue entry."""
-    # For LRU pre-decay increment to zero, otherwise increment by C.
-    p = self.C if self.T else 0.0
-    old_count = self.cqueue[key]
-    self.cqueue[key] += p
-    self.count_sum += p
-    self.count_sum2 += self.cqueue[key]**2 - old_count**2
-
-  def _incmqueue(self, key):
-    """Increment the access count of a mqueue entry."""
-    # If LRU pre-decay increment to zero, otherwise increment by C.
-    p = self.C if self.T else 0.0
-    old_count = self.mqueue[key]
-    self.mqueue[key] += p
-    self.mcount_sum += p
-    self.mcount_sum2 += self.mqueue[key]**2 - old_count**2
-
   def _setmqueue(self, k, p):
     """Set the access count of a new mqueue entry if it is good enough."""
-    # If LRU pre-decay the value to zero.
-    p = p if self.T else 0.0
-    if len(self.mqueue) < self.msize:
-      # There is space, just add a new entry.
-      self.mqueue[k] = p
+    # Add it if there is space or swap out the mqueue min entry if lower.
+    res = self.mqueue.pushswapitem(k, p, self.msize)
+    if res is None:
       self.mcount_sum += p
-      self.mcount_sum2 += p*p
-    elif self._mqueue_min <= p:
-      # It is higher than the mqueue min entry, replace it.
-      mink, minp = self.mqueue.swapitem(k, p)
+      if self._track_var:
+        self._mcount_sum2 += p*p
+    elif res is not False:
+      mink, minp = res
       self.mcount_sum += p - minp
-      self.mcount_sum2 += p*p - minp*minp
-
-  def _setcqueue(self, k, p):
-    """Set the access count of a new cqueue entry if it is good enough."""
-    # If LRU pre-decay the value to zero.
-    p = p if self.T else 0.0
-    if len(self.cqueue) < self.size:
-      # There is space, just add a new entry.
-      self.cqueue[k] = p
-      self.count_sum += p
-      self.count_sum2 += p*p
-    elif self._cqueue_min <= p:
-      # It is higher than the cqueue min entry, cascade to the mqueue.
-      mink, minp = self.cqueue.swapitem(k, p)
-      self._setmqueue(mink, minp)
-      self.count_sum += p - minp
-      self.count_sum2 += p*p - minp*minp
-      del self.data[mink]
-
-  def _movcqueue(self, k):
-    """Move a cqueue entry to the mqueue unconditionally."""
-    # Cascade a cqueue entry down to the mqueue.
-    # Note we do this even if it is higher than cqueue_min for deletions.
-    k, p = self.cqueue.popitem(k)
-    self.count_sum -= p
-    self.count_sum2 -= p*p
-    self._setmqueue(k, p)
-
-  def _movmqueue(self, k):
-    """Move an mqueue entry to the cqueue if it is good enough."""
-    if self._cqueue_min <= self.mqueue[k]:
-      # It is higher than the cqueue min entry, cascade it up to the cqueue.
-      k, p = self.mqueue.popitem(k)
-      self.mcount_sum -= p
-      self.mcount_sum2 -= p*p
-      self._setcqueue(k, p)
-
-  def _decayall(self):
-    """Apply decay to all counts."""
-    # Skip decaying already zeroed counts for LRU.
-    if self.T:
-      # Exponentially grow C O(1) instead of decaying all entries O(N).
-      self.C *= self.M
-      # If C has become too big, exponentially decay C and all counts back to 1.0.
-      if self.C >= 1.0e100:
-        decay = 1.0 / self.C
-        self.cqueue.scale(decay)
-        self.mqueue.scale(decay)
-        self.count_sum *= decay
-        self.mcount_sum *= decay
-        decay2 = decay * decay
-        self.count_sum2 *= decay2
-        self.mcount_sum2 *= decay2
-        self.C = 1.0
+      if self._track_var:
+        self._mcount_sum2 += (p - minp)*(p + minp)
+
+  def _rescale(self):
+    """Exponentially decay C and all counts back to 1.0."""
+    decay = 1.0 / self.C
+    self.cqueue.scale(decay)
+    self.mqueue.scale(decay)
+    self.count_sum *= decay
+    self.mcount_sum *= decay
+    decay2 = decay * decay
+    self._count_sum2 *= decay2
+    self._mcount_sum2 *= decay2
+    self.C = 1.0
 
   def __getitem__(self, key):
     self.get_count += 1
-    if key in self.cqueue:
+    T, C = self.T, self.C
+    # For LRU pre-decay counts to zero, otherwise increment by C.
+    p = C if T else 0.0
+    # The data keys are the cqueue keys, so this also checks for a hit.
+    value = self.data.get(key, _missing)
+    if value is not _missing:
       # Cache hit, increment count in cqueue.
       self.hit_count += 1
-      self._inccqueue(key)
-    elif key in self.mqueue:
-      # Metadata hit, increment count in mqueue.
-      self.mhit_count += 1
-      self._incmqueue(key)
+      old = self.cqueue.incitem(key, p)
+      self.count_sum += p
+      if self._track_var:
+        self._count_sum2 += p*(old + old + p)
     else:
-      # Cache miss, add it to the mqueue (if good enough).
-      self._setmqueue(key, self.C)
-    self._decayall()
-    return self.data[key]
+      mq = self.mqueue
+      if key in mq:
+        # Metadata hit, increment count in mqueue.
+        self.mhit_count += 1
+        old = mq.incitem(key, p)
+        self.mcount_sum += p
+        if self._track_var:
+          self._mcount_sum2 += p*(old + old + p)
+      else:
+        # Cache miss, add it to the mqueue (if good enough).
+        self._setmqueue(key, p)
+    # Apply decay to all counts, skipping already zeroed counts for LRU.
+    if T:
+      # Exponentially grow C O(1) instead of decaying all entries O(N).
+      C = self.C = C * self.M
+      # If C has become too big, decay C and all counts back to 1.0.
+      if C >= 1.0e100:
+        self._rescale()
+    if value is _missing:
+      if self.loader is None:
+        raise KeyError(key)
+      # Cache miss with a loader, load and set the value like a caller would.
+      value = self.loader(key)
+      self[key] = value
+    return value
 
   def __setitem__(self, key, value):
     self.set_count += 1
-    if key in self.mqueue:
-      # Move the entry from the mqueue to the cqueue (if good enough).
-      self._movmqueue(key)
-    elif key not in self.cqueue:
-      # Add a new entry to the cqueue (if good enough).
-      self._setcqueue(key, self.C)
-    if key in self.cqueue:
-      # It is in the cqueue, cache the value.
+    cq, mq = self.cqueue, self.mqueue
+    if key in cq:
+      # It is already in the cqueue, just update the cached value.
       self.data[key] = value
+      return
+    if key in mq:
+      # Move the entry from the mqueue to the cqueue if it is not lower
+      # than the cqueue min entry.
+      if mq[key] < self._cqueue_min:
+        return
+      _, p = mq.popitem(key)
+      self.mcount_sum -= p
+      if self._track_var:
+        self._mcount_sum2 -= p*p
+    else:
+      # Add a new entry, for LRU pre-decay the count to zero.
+      p = self.C if self.T else 0.0
+    # Add it if there is space or swap out the cqueue min entry if lower.
+    res = cq.pushswapitem(key, p, self.size)
+    if res is None:
+      self.count_sum += p
+      if self._track_var:
+        self._count_sum2 += p*p
+    elif res is False:
+      # It is lower than the cqueue min entry, don't cache it.
+      return
+    else:
+      # Cascade the swapped out cqueue min entry to the mqueue.
+      mink, minp = res
+      self._setmqueue(mink, minp)
+      self.count_sum += p - minp
+      if self._track_var:
+        self._count_sum2 += (p - minp)*(p + minp)
+      del self.data[mink]
+    # It is in the cqueue, cache the value.
+    self.data[key] = value
 
   def __delitem__(self, key):
-    # Move entry from the cqueue to the mqueue.
-    self._movcqueue(key)
-    self.data.pop(key)
+    # Move the entry from the cqueue to the mqueue.
+    # Note we do this even if it is higher than cqueue_min for deletions.
+    _, p = self.cqueue.popitem(key)
+    self.count_sum -= p
+    if self._track_var:
+      self._count_sum2 -= p*p
+    self._setmqueue(key, p)
+    del self.data[key]
+
+  def __contains__(self, key):
+    # Note this is a lookup that doesn't count as an access.
+    return key in self.data
 
   def __iter__(self):
     return iter(self.data)
@@ -343,6 +379,18 @@ class DLFUCache(abc.MutableMapping):
   def __len__(self):
     return len(self.data)
 
+  def getmany(self, keys, default=None):
+    """Get the values for a sequence of keys, with default for misses."""
+    getitem = self.__getitem__
+    values = []
+    append = values.append
+    for key in keys:
+      try:
+        append(getitem(key))
+      except KeyError:
+        append(default)
+    return values
+
   def getcount(self, key):
     """Get the access count for a cache entry."""
     if key in self.cqueue:
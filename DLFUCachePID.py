@@ -10,9 +10,10 @@ License : LGPL
 Download: http://minkirri.apana.org.au/~abo/projects/DLFUCache/
           https://github.com/dbaarda/DLFUCache
 
-Requires:
+Requires: PIDController
 """
 from collections import abc
+from PIDController import PIDController
 
 # Infinity, used to set T decay timeconstant for no decay.
 inf = float('inf')
@@ -39,10 +40,13 @@ class DLFUCache(abc.MutableMapping):
     mhit_count: The count of metadata hits.
     count_sum: the sum of all cache entry counts
     mcount_sum: the sum of all extra metadata counts.
-    count_sum2: The sum of the square of all cache entry counts.
-    mcount_sum2: the sum of the square of all extra metadata counts.
 
   Properties:
+    track_var: If running sums of squares are kept for the variance stats.
+    count_sum2: The sum of the square of all cache entry counts.
+    mcount_sum2: the sum of the square of all extra metadata counts.
+    Note count_sum2 and mcount_sum2 are read-only, and are calculated O(N)
+    from the counts if track_var is not set and T is not zero.
     count_min: The minimum count value for cache entries.
     count_avg: The average of count values for cache entries.
     count_var: The variance of count values for cache entries.
@@ -64,12 +68,19 @@ class DLFUCache(abc.MutableMapping):
     thit_rate: The hit_rate for cache+metadata.
   """
 
-  def __init__(self, size, msize=None, T=4.0):
+  __slots__ = (
+      'size', 'msize', 'data', 'C', 'T', 'M', 'cnum', 'mnum', 'cpid', 'mpid',
+      'last_get', 'get_count', 'set_count', 'del_count', 'hit_count',
+      'mhit_count', 'count_sum', 'mcount_sum', '_track_var', '_count_sum2',
+      '_mcount_sum2')
+
+  def __init__(self, size, msize=None, T=4.0, track_var=False):
     if msize is None:
       msize = size
     self.size = size
     self.msize = msize
     self.T = T
+    self._track_var = track_var
     if T == 0.0:
       # Behave like LRU with all counts decayed to zero.
       self.M = inf
@@ -89,10 +100,12 @@ class DLFUCache(abc.MutableMapping):
     self.C = 1.0
     self.count_sum = 0.0
     self.mcount_sum = 0.0
-    self.count_sum2 = 0.0
-    self.mcount_sum2 = 0.0
-    self.cpid = PIDController.ZiglerNichols(cls, 1.0, self.T*self.size/4)
-    self.mpid = PIDController.ZiglerNichols(cls, 1.0, self.T*self.size/4)
+    self._count_sum2 = 0.0
+    self._mcount_sum2 = 0.0
+    # The pid oscillation period, using size/4 for LRU and LFU.
+    Tu = self.T*self.size/4 if 0.0 < self.T < inf else self.size/4
+    self.cpid = PIDController.ZiglerNichols(1.0, Tu)
+    self.mpid = PIDController.ZiglerNichols(1.0, Tu)
     self.last_get = 0
     self.reset_stats()
 
@@ -135,6 +148,27 @@ class DLFUCache(abc.MutableMapping):
     """The sum of all cache+metadata entry counts."""
     return self.count_sum + self.mcount_sum
 
+  @property
+  def track_var(self):
+    """If running sums of squares are kept for the variance stats."""
+    return self._track_var
+
+  @property
+  def count_sum2(self):
+    """The sum of the squares of all cache entry counts."""
+    if self._track_var or not self.T:
+      return self._count_sum2
+    # Not tracked, so calculate it O(N) from the data.
+    return sum(c*c for c, d in self.data.values() if d is not None)
+
+  @property
+  def mcount_sum2(self):
+    """The sum of the squares of all extra metadata counts."""
+    if self._track_var or not self.T:
+      return self._mcount_sum2
+    # Not tracked, so calculate it O(N) from the data.
+    return sum(c*c for c, d in self.data.values() if d is None)
+
   @property
   def tcount_sum2(self):
     """The sum of the squares of all cache+metadata entry counts."""
@@ -221,12 +255,15 @@ class DLFUCache(abc.MutableMapping):
       # For non-LRU increment decaying count and sums.
       p = self.C
       newcount = count + p
-      if data:
+      # Note newcount**2 - count**2 == p*(count + newcount).
+      if data is not None:
         self.count_sum += p
-        self.count_sum2 += newcount**2 - count**2
+        if self._track_var:
+          self._count_sum2 += p*(count + newcount)
       else:
         self.mcount_sum += p
-        self.mcount_sum2 += newcount**2 - count**2
+        if self._track_var:
+          self._mcount_sum2 += p*(count + newcount)
     else:
       # For LRU pre-decay counts to zero and use C as the score.
       newcount = self.C
@@ -236,28 +273,32 @@ class DLFUCache(abc.MutableMapping):
     """Delete and decrement count sums for an entry."""
     if self.T:
       # For non-LRU decrement decaying count sums.
-      if data:
+      if data is not None:
         self.cnum -= 1
         self.count_sum -= count
-        self.count_sum2 -= count**2
+        if self._track_var:
+          self._count_sum2 -= count**2
       else:
         self.mnum -= 1
         self.mcount_sum -= count
-        self.mcount_sum2 -= count**2
+        if self._track_var:
+          self._mcount_sum2 -= count**2
     del self.data[key]
 
   def _addentry(self, key, count, data):
     """Add and increment count sums for an entry."""
     if self.T:
       # For non-LRU increment decaying count sums.
-      if data:
+      if data is not None:
         self.cnum += 1
         self.count_sum += count
-        self.count_sum2 += count**2
+        if self._track_var:
+          self._count_sum2 += count**2
       else:
         self.mnum += 1
         self.mcount_sum += count
-        self.mcount_sum2 += count**2
+        if self._track_var:
+          self._mcount_sum2 += count**2
     self.data[key] = (count, data)
 
   def _decayall(self):
@@ -274,8 +315,8 @@ class DLFUCache(abc.MutableMapping):
         self.count_sum *= decay
         self.mcount_sum *= decay
         decay2 = decay * decay
-        self.count_sum2 *= decay2
-        self.mcount_sum2 *= decay2
+        self._count_sum2 *= decay2
+        self._mcount_sum2 *= decay2
         self.C = 1.0
     else:
       # For LRU we just increment C.
@@ -298,26 +339,32 @@ class DLFUCache(abc.MutableMapping):
         mdel.append((key, count, data))
       elif count < cmin and data is not None:
         # score to low to keed data, add to data delete list.
-        cdel.append(key, count, data)
+        cdel.append((key, count, data))
     # delete entries in metadata delete list.
     for d in mdel:
       self._delentry(*d)
     # move entries in data delete list to metadata.
-    for d in cdel:
-        self._delentry(*d)
-        self._addentry(*d)
+    for key, count, data in cdel:
+      self._delentry(key, count, data)
+      self._addentry(key, count, None)
     # Update pid controllers for next evict cycle.
     dt = self.get_count - self.last_get
     merror = 0.95 - self.mnum/self.msize
     cerror = 0.95 - self.cnum/self.size
-    self.mpid.Update(merror,dt)
-    self.cpid.Update(cerror,dt)
+    self.mpid.update(merror, dt)
+    self.cpid.update(cerror, dt)
     self.last_get = self.get_count
     
   def __getitem__(self, key):
     self.get_count += 1
-    if key in self.data:
-      count, data = self.data[key]
+    # Entries are (count, data) tuples so None means a new entry.
+    entry = self.data.get(key)
+    if entry is not None:
+      count, data = entry
+      if data is None:
+        self.mhit_count += 1
+      else:
+        self.hit_count += 1
       self._incentry(key, count, data)
     else:
       count, data = self.C, None
@@ -329,9 +376,10 @@ class DLFUCache(abc.MutableMapping):
 
   def __setitem__(self, key, value):
     self.set_count += 1
-    if key in self.data:
-       count, data = self.data[key]
-       self._delentry(key, count, data)
+    entry = self.data.get(key)
+    if entry is not None:
+      count, data = entry
+      self._delentry(key, count, data)
     else:
       count = self.C
     self._addentry(key, count, value)
@@ -342,8 +390,8 @@ class DLFUCache(abc.MutableMapping):
     if data is None:
       raise KeyError(key)
     # Move the entry to a metadata entry.
-    self._delentry(count,data)
-    self._addentry(count,None)
+    self._delentry(key, count, data)
+    self._addentry(key, count, None)
 
   def __iter__(self):
     return iter(self.data)
@@ -0,0 +1,18 @@
+#!/usr/bin/pypy3
+"""Tests for DLFUCachePID.
+
+This runs the DLFUCache_perf test loads against the pid controlled
+DLFUCache in DLFUCachePID.
+"""
+from DLFUCache_perf import *
+from DLFUCachePID import DLFUCache
+
+
+if __name__ == '__main__':
+  N = 1024
+  C = 128 * N
+  keys = allkeys(N, C)
+  for T in (1.0, 4.0, 16.0):
+    for M in (N//2, N, 2*N):
+      cache = DLFUCache(N, M, T)
+      alltests(cache, N, C, keys)
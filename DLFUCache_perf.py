@@ -26,6 +26,11 @@ def get(cache, key):
     cache[key] = key
 
 
+def loadkey(key):
+  """Cache loader that sets the value to the key like get()."""
+  return key
+
+
 def wrap(v, minv, maxv):
   "Wrap a value around between limits min <= v < max."""
   if v < minv:
@@ -44,16 +49,18 @@ def cycle(*gens):
 def expo(median, offset=0):
   """Exponential distribution access generator."""
   lambd = math.log(2)/median
+  expovariate = random.expovariate
   while True:
-    yield int(random.expovariate(lambd) + offset)
+    yield int(expovariate(lambd) + offset)
 
 
 def walk(variance, start=MAXK//2, minv=0, maxv=MAXK):
   """Stochastic "gaussian walk" access generator."""
   mu = start
   sigma = variance**0.5
+  gauss = random.gauss
   while True:
-    mu = wrap(random.gauss(mu, sigma), minv, maxv)
+    mu = wrap(gauss(mu, sigma), minv, maxv)
     yield int(mu)
 
 
@@ -70,8 +77,7 @@ def jump(median, start=0, dist=4, wait=16):
   offset = start
   duration = int(wait * median)
   while True:
-    for i in itertools.islice(expo(median, offset), duration):
-      yield i
+    yield from itertools.islice(expo(median, offset), duration)
     offset += dist*median
 
 
@@ -79,8 +85,8 @@ def wave(median, start=0, step=0.25, minv=0, maxv=MAXK):
   """Sliding expo wave access generator."""
   egen=expo(median)
   sgen=scan(start, step, minv, maxv)
-  while True:
-    yield wrap(next(sgen) - next(egen), minv, maxv)
+  for s, e in zip(sgen, egen):
+    yield wrap(s - e, minv, maxv)
 
 
 def mixed(size):
@@ -102,21 +108,39 @@ def runtest(name, cache, gen, count=1000):
   return cache.hit_rate
 
 
-def alltests(cache, N, C):
-  e = runtest("expo", cache, expo(N), C)
-  j = runtest("jump", cache, jump(N), C)
-  s = runtest("wave", cache, wave(N//2), C)
-  w = runtest("walk", cache, walk(2*N), C)
-  m = runtest("mixed", cache, mixed(N//4), C)
+def allgens(N):
+  """Get the access generators for all the test loads."""
+  return expo(N), jump(N), wave(N//2), walk(2*N), mixed(N//4)
+
+
+def allkeys(N, C):
+  """Get lists of the count accesses for all the test loads."""
+  keys = []
+  for gen in allgens(N):
+    # Seed the same as runtest() so the accesses are identical.
+    random.seed(7)
+    keys.append(list(itertools.islice(gen, C)))
+  return keys
+
+
+def alltests(cache, N, C, keys=None):
+  """Run all the test loads, optionally using precalculated keys."""
+  e,j,s,w,m = keys or allgens(N)
+  e = runtest("expo", cache, e, C)
+  j = runtest("jump", cache, j, C)
+  s = runtest("wave", cache, s, C)
+  w = runtest("walk", cache, w, C)
+  m = runtest("mixed", cache, m, C)
   return e,j,s,w,m
 
 
 if __name__ == '__main__':
   N = 1024
   C = 128 * N
+  keys = allkeys(N, C)
   for T in (0.0, 1.0, 2.0, 4.0, 8.0, 16.0, inf):
     for M in (0, N//2, N, 2*N):
-      cache = DLFUCache(N, M, T)
-      alltests(cache, N, C)
+      cache = DLFUCache(N, M, T, loader=loadkey)
+      alltests(cache, N, C, keys)
   cache = ARCCache(N)
-  alltests(cache, N, C)
+  alltests(cache, N, C, keys)
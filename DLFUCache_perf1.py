@@ -29,7 +29,7 @@ def get_label(T):
 def get_cache(N, M, T):
   if T == 'ARC':
     return ARCCache(N)
-  return DLFUCache(N, M, T)
+  return DLFUCache(N, M, T, loader=loadkey)
 
 
 def add_results(results, N, M, T, D, hits):
@@ -38,14 +38,14 @@ def add_results(results, N, M, T, D, hits):
     results[key] = hit
 
 
-def allloadtests(results, N, M, T, D, C):
+def allloadtests(results, N, M, T, D, C, keys):
   if ('expo', N, M, T, D) not in results:
     # Reuse ARC results for M=0 since ARC doesn't vary with M.
     if T == 'ARC' and ('expo', N, 0, T, D) in results:
       hits = (results[(load, N, 0, T, D)] for load in loads)
     else:
       cache = get_cache(N, M, T)
-      hits = alltests(cache, D, C)
+      hits = alltests(cache, D, C, keys)
       # Set ARC results for M=0 since ARC doesn't vary with M.
       if T == 'ARC' and M != 0:
         add_results(results, N, 0, T, D, hits)
@@ -54,8 +54,13 @@ def allloadtests(results, N, M, T, D, C):
 
 def allcachetests(results, N, M, D, I):
   C = I * D
+  # Skip generating the load keys if all the results are already done.
+  if all(('expo', N, M, T, D) in results for T in Ts):
+    return
+  # Generate the load keys once and reuse them for all the caches.
+  keys = allkeys(D, C)
   for T in Ts:
-    allloadtests(results, N, M, T, D, C)
+    allloadtests(results, N, M, T, D, C, keys)
 
 
 def saveplt(filename, title, xlabel=None, xticks=None, xlabels=None,
@@ -2,7 +2,9 @@
 
 def limit(value, minValue, maxValue):
   # limit a value between min and max
-  return min(max(minValue, value), maxValue)
+  if value > maxValue:
+    return maxValue
+  return value if value > minValue else minValue
 
 
 class PIDController(object):
@@ -37,6 +39,8 @@ class PIDController(object):
     output: The control output.
   """
 
+  __slots__ = ('Kp', 'Ki', 'Kd', 'Ld', 'Le', 'error', 'integ', 'deriv', 'output')
+
   outputMin = -1.0
   outputMax = 1.0
   integMin = outputMin - 1.0 * (outputMax - outputMin)
@@ -109,12 +113,13 @@ class PIDController(object):
     Returns:
       The control output.
     """
+    preverror, Ld, Le = self.error, self.Ld, self.Le
     # Calculate proportional term and lowpass filter if needed.
     error = self.Kp * error
-    if self.Le:
-      error = (dt * error + self.Le * self.error) / (dt + self.Le)
+    if Le:
+      error = (dt * error + Le * preverror) / (dt + Le)
     # Accumulate trapezoidal integral of error scaled by Ki.
-    integ = self.Ki * dt * (error + self.error) / 2.0 + self.integ
+    integ = self.Ki * dt * (error + preverror) / 2.0 + self.integ
     # Limit integral term between integMin and integMax.
     integ = limit(integ, self.integMin, self.integMax)
     # Calculate linear derivative of error scaled by Kd and low-pass filter.
@@ -123,14 +128,15 @@ class PIDController(object):
     #   deriv = self.Kd * (error - self.error) / dt
     #   alpha = dt / (dt + self.Ld)
     #   deriv = alpha * deriv + (1.0 - alpha) * self.deriv
-    deriv = (self.Kd * (error - self.error) + self.Ld * self.deriv) / (dt + self.Ld)
+    deriv = (self.Kd * (error - preverror) + Ld * self.deriv) / (dt + Ld)
     # Calculate and limit output between outputMin and outputMax.
-    self.output = limit(error + integ + deriv, self.outputMin, self.outputMax)
+    output = limit(error + integ + deriv, self.outputMin, self.outputMax)
     # Save state variables.
     self.error = error
     self.integ = integ
     self.deriv = deriv
-    return self.output
+    self.output = output
+    return output
 
   def reset(self, error, dt=0.0):
     """Reset previous error to the provided value then update.
@@ -159,6 +165,8 @@ class PIDController(object):
 
 class LowPassFilter(object):
 
+  __slots__ = ('T', 'output')
+
   def __init__(self, T, output=0.0):
     self.T = T
     self.output = output
@@ -177,6 +185,8 @@ class LowPassFilter(object):
 class LowPassFilter2(object):
   "A lowpass filter with different timeconstants for rising and falling."""
 
+  __slots__ = ('Tup', 'Tdn', 'output')
+
   def __init__(self, Tup, Tdn, output=0.0):
     self.Tup = Tup
     self.Tdn = Tdn
@@ -3,12 +3,20 @@ import heapq
 import bisect
 from collections import abc
 
+# Marker for unspecified optional arguments.
+_marker = object()
+
+
+def _items(*args, **kwargs):
+  """Get the items for dict() style args without copying a dict arg."""
+  if len(args) == 1 and not kwargs and isinstance(args[0], dict):
+    return args[0].items()
+  return dict(*args, **kwargs).items()
+
 
 class PQueueVect(abc.MutableMapping):
   """A PQueue implemented using Python's list."""
 
-  __marker = object()
-
   def __init__(self, *args, **kwargs):
     self.queue = self._queue(*args, **kwargs)
     self.data = dict((e[1], e) for e in self.queue)
@@ -27,6 +35,9 @@ class PQueueVect(abc.MutableMapping):
   def __delitem__(self, key):
     self._pull(self.data.pop(key))
 
+  def __contains__(self, key):
+    return key in self.data
+
   def __iter__(self):
     return iter(self.data)
 
@@ -37,17 +48,17 @@ class PQueueVect(abc.MutableMapping):
     self.data.clear()
     self.queue = self._queue()
 
-  def peekitem(self, key=__marker):
+  def peekitem(self, key=_marker):
     """peekitem() -> key, value."""
-    if key is self.__marker:
+    if key is _marker:
       return self._peek()
     else:
       return self._peek(self.data[key])
 
-  def popitem(self, key=__marker):
+  def popitem(self, key=_marker):
     """popitem([key]) -> key, value."""
     d = self.data
-    if key is self.__marker:
+    if key is _marker:
       try:
         key, value = self._pull()
       except IndexError:
@@ -57,10 +68,10 @@ class PQueueVect(abc.MutableMapping):
     else:
       return self._pull(d.pop(key))
 
-  def swapitem(self, key, value, oldkey=__marker):
+  def swapitem(self, key, value, oldkey=_marker):
     """swapitem(key, value, [oldkey]) -> oldkey, oldvalue."""
     d = self.data
-    if oldkey is self.__marker:
+    if oldkey is _marker:
       entry, oldkey, oldvalue = self._swap(key, value)
     else:
       entry, oldkey, oldvalue = self._swap(key, value, d[oldkey])
@@ -68,6 +79,33 @@ class PQueueVect(abc.MutableMapping):
     d[key] = entry
     return oldkey, oldvalue
 
+  def incitem(self, key, inc):
+    """incitem(key, inc) -> oldvalue."""
+    d = self.data
+    entry = d[key]
+    _, oldvalue = self._peek(entry)
+    d[key], _, _ = self._swap(key, oldvalue + inc, entry)
+    return oldvalue
+
+  def pushswapitem(self, key, value, size):
+    """pushswapitem(key, value, size) -> None, (oldkey, oldvalue), or False.
+
+    Push a new item if there are less than size items, otherwise swap it
+    for the top item if that is not higher than value. Returns None if
+    the item was pushed, the top item if it was swapped out, or False if
+    the item was not added.
+    """
+    d = self.data
+    if len(d) < size:
+      d[key] = self._push(key, value)
+      return None
+    if size and self._peek()[1] <= value:
+      entry, oldkey, oldvalue = self._swap(key, value)
+      del d[oldkey]
+      d[key] = entry
+      return oldkey, oldvalue
+    return False
+
   def scale(self, mult):
     """scale(mult)."""
     for e in self.queue:
@@ -75,23 +113,30 @@ class PQueueVect(abc.MutableMapping):
 
   def _queue(self, *args, **kwargs):
     """_queue(*args, **kwargs) -> queue."""
-    return sorted([v, k] for k,v in dict(*args, **kwargs).items())
+    return sorted([v, k] for k,v in _items(*args, **kwargs))
 
   def _peek(self, entry=None):
     """_peek([entry]) -> key, value."""
-    value, key = entry or self.queue[0]
+    if entry is None:
+      entry = self.queue[0]
+    value, key = entry
     return key, value
 
   def _push(self, key, value):
     """_push(key, value) -> entry."""
+    q = self.queue
     entry = [value, key]
-    bisect.insort(self.queue, entry)
+    # New entries are often the highest, so check the end first.
+    if not q or q[-1] <= entry:
+      q.append(entry)
+    else:
+      bisect.insort(q, entry)
     return entry
 
   def _pull(self, entry=None):
     """_pull([entry]) -> key, value."""
     q = self.queue
-    if entry:
+    if entry is not None:
       del q[bisect.bisect(q, entry) - 1]
     else:
       entry = q.pop(0)
@@ -109,24 +154,23 @@ class PQueueDeque(PQueueVect):
 
   def _queue(self, *args, **kwargs):
     return collections.deque(
-        sorted([v, k] for k,v in dict(*args, **kwargs).items()))
-
-  def _insert(self, i, e):
-    q = self.queue
-    q.rotate(-i)
-    q.appendleft(e)
-    q.rotate(i)
+        sorted([v, k] for k,v in _items(*args, **kwargs)))
 
   def _push(self, key, value):
     """push(key, value) -> entry."""
+    q = self.queue
     entry = [value, key]
-    self._insert(bisect.bisect(self.queue, entry), entry)
+    # New entries are often the highest, so check the end first.
+    if not q or q[-1] <= entry:
+      q.append(entry)
+    else:
+      q.insert(bisect.bisect(q, entry), entry)
     return entry
 
   def _pull(self, entry=None):
     """_pull([entry]) -> key, value."""
     q = self.queue
-    if entry:
+    if entry is not None:
       del q[bisect.bisect(q, entry) - 1]
     else:
       entry = q.popleft()
@@ -153,12 +197,31 @@ class PQueueHeapqD(PQueueVect):
 
   __deleted = Deleted()
 
+  def __init__(self, *args, **kwargs):
+    # The count of deleted entries still in the queue.
+    self._ndeleted = 0
+    super(PQueueHeapqD, self).__init__(*args, **kwargs)
+
+  def clear(self):
+    super(PQueueHeapqD, self).clear()
+    self._ndeleted = 0
+
+  def _compact(self):
+    """Remove all the deleted entries from the queue."""
+    q = [e for e in self.queue if e[1] is not self.__deleted]
+    heapq.heapify(q)
+    self.queue = q
+    self._ndeleted = 0
+
   def _peek(self, entry=None):
     """_peek([entry]) -> key, value."""
     q = self.queue
-    value, key = entry or q[0]
+    if entry is None:
+      entry = q[0]
+    value, key = entry
     while key is self.__deleted:
       heapq.heappop(q)
+      self._ndeleted -= 1
       value, key = q[0]
     return key, value
 
@@ -170,18 +233,23 @@ class PQueueHeapqD(PQueueVect):
 
   def _pull(self, entry=None):
     """_pull([entry]) -> key, value."""
-    if entry:
+    q = self.queue
+    if entry is not None:
       value, key = entry
       entry[1] = self.__deleted
+      self._ndeleted += 1
     else:
       # Suck out any deleted items.
       self._peek()
-      value, key = heapq.heappop(self.queue)
+      value, key = heapq.heappop(q)
+    # Compact the queue if it is mostly deleted entries.
+    if 2 * self._ndeleted > len(q):
+      self._compact()
     return key, value
 
   def _swap(self, key, value, oldentry=None):
     """_swap(key, value, [oldentry]) -> entry, oldkey, oldvalue."""
-    if oldentry:
+    if oldentry is not None:
       oldkey, oldvalue = self._pull(oldentry)
       entry = self._push(key, value)
     else:
@@ -243,14 +311,16 @@ class PQueueHeapq(PQueueVect):
 
   def _queue(self, *args, **kwargs):
     """_queue(*args, **kwargs) -> queue."""
-    heap = [[v, k, i] for i,(k,v) in enumerate(dict(*args, **kwargs).items())]
+    heap = [[v, k, i] for i,(k,v) in enumerate(_items(*args, **kwargs))]
     for i in reversed(range(len(heap)//2)):
       _shiftdn(heap, heap[i])
     return heap
 
   def _peek(self, entry=None):
     """_peek([entry]) -> key, value."""
-    value, key, _ = entry or self.queue[0]
+    if entry is None:
+      entry = self.queue[0]
+    value, key, _ = entry
     return key, value
 
   def _push(self, key, value):
@@ -265,7 +335,8 @@ class PQueueHeapq(PQueueVect):
   def _pull(self, entry=None):
     """_pull([entry]) -> key, value."""
     heap = self.queue
-    entry = entry or heap[0]
+    if entry is None:
+      entry = heap[0]
     last = heap.pop()
     value, key, pos = entry
     if last is not entry:
@@ -281,7 +352,7 @@ class PQueueHeapq(PQueueVect):
   def _swap(self, key, value, oldentry=None):
     """_swap(key, value, [oldentry]) -> entry, oldkey, oldvalue."""
     heap = self.queue
-    entry = oldentry or heap[0]
+    entry = heap[0] if oldentry is None else oldentry
     oldvalue, oldkey, _ = entry
     # Set the entry and shift it into place.
     entry[0], entry[1] = value, key
@@ -321,10 +392,24 @@ class PQueueLRU(PQueueDList):
   """
 
   def _push(self, key, value):
-    entry = self.queue.newentry(key, value)
-    self.queue.insert(entry)
+    q = self.queue
+    entry = q.newentry(key, value)
+    q.insert(entry)
     return entry
 
+  def _swap(self, key, value, oldentry=None):
+    """_swap(key, value, [oldentry]) -> entry, oldkey, oldvalue."""
+    q = self.queue
+    entry = q.sentinel[2] if oldentry is None else oldentry
+    if entry is q.sentinel:
+      raise IndexError('swap() from empty DList')
+    oldvalue, oldkey = entry[0], entry[1]
+    # Reuse the old entry by moving it to the end of the queue.
+    q.remove(entry)
+    entry[0], entry[1] = value, key
+    q.insert(entry)
+    return entry, oldkey, oldvalue
+
 
 class CDList(abc.Container, abc.Iterable, abc.Sized):
   """A doubly linked list with cursor for sorted inserts.
@@ -335,12 +420,17 @@ class CDList(abc.Container, abc.Iterable, abc.Sized):
   """
 
   def __init__(self, *args, **kwargs):
-    self.count = 0
+    entries = sorted(self.newentry(k,v) for k,v in _items(*args, **kwargs))
+    self.count = len(entries)
     # Create a sentinel entry for the start/end of the circular dlist.
     s = self.newentry(None, None)
-    s[2] = s[3] = self.sentinel = self.cursor = s
-    for e in sorted(self.newentry(k,v) for k,v in dict(*args, **kwargs).items()):
-      self.insert(e)
+    self.sentinel = self.cursor = s
+    # Link the sorted entries between the sentinel's next and prev.
+    prev = s
+    for e in entries:
+      prev[2], e[3] = e, prev
+      prev = e
+    prev[2], s[3] = s, prev
 
   def __contains__(self, value):
     for entry in self:
@@ -369,7 +459,8 @@ class CDList(abc.Container, abc.Iterable, abc.Sized):
   def insert(self, entry, pos=None):
     """Insert entry into dlist before pos."""
     # Set pos to the sentinal if unspecified.
-    pos = pos or self.sentinel
+    if pos is None:
+      pos = self.sentinel
     # Get the entries after/before the insertion point.
     next, prev = pos, pos[3]
     # Update the entry before and after.
@@ -392,23 +483,26 @@ class CDList(abc.Container, abc.Iterable, abc.Sized):
 
   def insort(self, entry, pos=None):
     """Insert entry into sorted dlist, with optional pos hint."""
+    sentinel, value = self.sentinel, entry[0]
     # Set sentinel equal to entry to stop scans at the sentinel.
-    self.sentinel[0] = entry[0]
+    sentinel[0] = value
     # Scan from the sentinel if pos not specified.
-    pos = pos or self.sentinel
+    if pos is None:
+      pos = sentinel
     # Scan backwards from pos for a smaller or equal entry.
     pos = pos[3]
-    while pos[0] > entry[0]:
+    while pos[0] > value:
       pos = pos[3]
     # Scan forwards from pos for greater or equal entry.
     pos = pos[2]
-    while pos[0] < entry[0]:
+    while pos[0] < value:
       pos = pos[2]
     # Insert before greater or equal entry.
     self.insert(entry, pos)
 
   def peek(self, entry=None):
-    entry = entry or self.sentinel[2]
+    if entry is None:
+      entry = self.sentinel[2]
     return entry[1], entry[0]
 
   def push(self, key, value):
@@ -418,7 +512,8 @@ class CDList(abc.Container, abc.Iterable, abc.Sized):
     return entry
 
   def pull(self, entry=None):
-    entry = entry or self.sentinel[2]
+    if entry is None:
+      entry = self.sentinel[2]
     if entry is self.sentinel:
       raise IndexError('pull() from empty DList')
     self.remove(entry)